@@ -25,7 +25,7 @@ def print_usage():
     """
     print("Usage:")
     print("  python3 main.py test")
-    print("  python3 main.py run <qcdl_file>")
+    print("  python3 main.py run <qcdl_file> [num_shots]")
     sys.exit(1)
 
 def main():
@@ -54,7 +54,14 @@ def main():
             print("Error: No QCDL file specified.")
             print_usage()
         filename = sys.argv[2]
-        QCLDExecutor.run(filename)
+        num_shots = None
+        if len(sys.argv) > 3:
+            try:
+                num_shots = int(sys.argv[3])
+            except ValueError:
+                print(f"Error: Invalid number of shots '{sys.argv[3]}'.")
+                print_usage()
+        QCLDExecutor.run(filename, num_shots)
 
     else:
         """
@@ -0,0 +1,186 @@
+"""
+This module implements a matrix-product-state (MPS) backend for circuits described in QCDL.
+Instead of the dense 2^N state vector used by the deterministic simulator, the state is
+stored as one rank-3 tensor per qubit with a configurable bond-dimension cutoff, so
+low-entanglement circuits on many qubits stay polynomial in memory instead of exponential.
+
+Author: Tex024
+Date: 27/08/2026
+"""
+
+import numpy as np
+from src.qparser import Operation
+from src.qsimulator import UNITARY_MAP, CONTROLLED_MAP
+
+# Two-qubit SWAP matrix, used to bring non-adjacent qubit pairs next to each other.
+SWAP_GATE: np.ndarray = np.array([[1, 0, 0, 0],
+                                  [0, 0, 1, 0],
+                                  [0, 1, 0, 0],
+                                  [0, 0, 0, 1]], dtype=complex)
+
+
+def controlled_matrix(operator: np.ndarray) -> np.ndarray:
+    """Builds the 4x4 controlled version of a 2x2 gate, with the control qubit first."""
+    matrix = np.eye(4, dtype=complex)
+    matrix[2:, 2:] = operator
+    return matrix
+
+
+#################
+# MPS SIMULATOR #
+#################
+
+class MPSSimulator:
+    """
+    Simulator that evolves the circuit state as a matrix product state.
+    Each qubit is a tensor of shape (left_bond, 2, right_bond); two-qubit gates are
+    applied by contracting neighbouring tensors and splitting them back with a
+    truncated SVD, keeping at most `chi` singular values per bond.
+    """
+    operations: list[Operation]
+    qubit_names: list[str]
+    num_qubits: int
+    chi: int
+    tensors: list[np.ndarray]
+
+    def __init__(self, operations: list[Operation], chi: int = 64):
+        """Initializes the MPS simulator with a list of operations and a bond-dimension cutoff."""
+        self.operations = operations
+        self.chi = chi
+        self.qubit_names = []
+        self.tensors = []
+        for op in operations:
+            if op.type == "define":
+                self.qubit_names.append(op.target)
+                alpha, beta = op.state
+                self.tensors.append(np.array([alpha, beta], dtype=complex).reshape(1, 2, 1))
+        if not self.qubit_names:
+            raise ValueError("No qubits defined in the circuit.")
+        self.num_qubits = len(self.qubit_names)
+        self._qubit_index = {name: index for index, name in enumerate(self.qubit_names)}
+
+    def get_qubit_index(self, qubit_name: str) -> int:
+        """Retrieves the index of a qubit by its name with an O(1) dict lookup."""
+        try:
+            return self._qubit_index[qubit_name]
+        except KeyError:
+            raise ValueError(f"Qubit {qubit_name} not found.")
+
+    def apply_one_qubit(self, operator: np.ndarray, site: int) -> None:
+        """Applies a one-qubit gate by contracting it into the site tensor."""
+        self.tensors[site] = np.einsum("ab,lbr->lar", operator, self.tensors[site])
+
+    def apply_two_qubit(self, operator: np.ndarray, site: int) -> None:
+        """
+        Applies a two-qubit gate to the adjacent sites (site, site + 1).
+        The two tensors are merged, the 4x4 gate is contracted in, and the result is
+        split back with an SVD truncated to the chi largest singular values.
+        """
+        left, right = self.tensors[site], self.tensors[site + 1]
+        bond_left, bond_right = left.shape[0], right.shape[2]
+        theta = np.einsum("lar,rbs->labs", left, right)
+        theta = np.einsum("cdab,labs->lcds", operator.reshape(2, 2, 2, 2), theta)
+        theta = theta.reshape(bond_left * 2, 2 * bond_right)
+
+        u, singular_values, vh = np.linalg.svd(theta, full_matrices=False)
+        keep = min(self.chi, int(np.sum(singular_values > 1e-12)) or 1)
+        u = u[:, :keep]
+        singular_values = singular_values[:keep]
+        vh = vh[:keep, :]
+
+        self.tensors[site] = u.reshape(bond_left, 2, keep)
+        self.tensors[site + 1] = (singular_values[:, None] * vh).reshape(keep, 2, bond_right)
+
+    def apply_two_qubit_anywhere(self, operator: np.ndarray, first: int, second: int) -> None:
+        """
+        Applies a 4x4 gate acting on (first, second) in that qubit order, swapping the
+        first qubit next to the second when they are not adjacent and swapping it back after.
+        """
+        if first == second:
+            raise ValueError("Two-qubit gate requires two distinct qubits.")
+        position = first
+        step = 1 if second > first else -1
+        while abs(second - position) > 1:
+            self.apply_two_qubit(SWAP_GATE, min(position, position + step))
+            position += step
+        if position < second:
+            self.apply_two_qubit(operator, position)
+        else:
+            # The control sits to the right of the target: swap the gate's qubit order.
+            swapped = SWAP_GATE @ operator @ SWAP_GATE
+            self.apply_two_qubit(swapped, second)
+        while position != first:
+            self.apply_two_qubit(SWAP_GATE, min(position, position - step))
+            position -= step
+
+    def run(self) -> list[np.ndarray]:
+        """Evolves the MPS by sequentially applying all quantum operations."""
+        for op in self.operations:
+            if op.type == "define":
+                continue
+            elif op.type == "unitary":
+                if op.matrix is not None:
+                    operator = op.matrix
+                elif op.gate in UNITARY_MAP:
+                    operator = UNITARY_MAP[op.gate]
+                else:
+                    raise ValueError(f"Unknown unitary gate: {op.gate}")
+                self.apply_one_qubit(operator, self.get_qubit_index(op.target))
+            elif op.type == "controlled":
+                if op.gate not in CONTROLLED_MAP:
+                    raise ValueError(f"Unknown controlled gate: {op.gate}")
+                if len(op.controllers) != 1:
+                    raise ValueError("The MPS backend supports single-controller gates only.")
+                control = self.get_qubit_index(op.controllers[0])
+                target = self.get_qubit_index(op.target)
+                self.apply_two_qubit_anywhere(controlled_matrix(CONTROLLED_MAP[op.gate]), control, target)
+            elif op.type == "measurement":
+                # Measurement halts further operations.
+                break
+            else:
+                raise ValueError(f"Unknown operation type: {op.type}")
+        return self.tensors
+
+    def to_statevector(self) -> np.ndarray:
+        """Contracts the MPS back into a dense 2^N state vector (only viable for small N)."""
+        state = self.tensors[0]
+        for tensor in self.tensors[1:]:
+            state = np.tensordot(state, tensor, axes=([-1], [0]))
+        return state.reshape(-1)
+
+    def get_probabilities(self) -> np.ndarray:
+        """Returns the outcome probabilities of the contracted state."""
+        return np.abs(self.to_statevector()) ** 2
+
+
+########
+# MAIN #
+########
+
+if __name__ == "__main__":
+    # Equivalence check (run as `python -m src.mps_backend`): evolve every
+    # tests/*.qcdl circuit as an MPS and compare the contracted statevector against
+    # the dense simulator. x.qcdl is excluded because it uses multi-controller
+    # gates, which this backend rejects.
+    import os
+    import sys
+    from src.qparser import QCDLCompiler
+    from src.qsimulator import Simulator
+
+    failed = False
+    for name in sorted(os.listdir("tests")):
+        if not name.endswith(".qcdl"):
+            continue
+        path = os.path.join("tests", name)
+        with open(path, "r") as file:
+            compiler = QCDLCompiler()
+            compiler.compile(file.read())
+        dense_state = Simulator(compiler.operations).run()
+        mps = MPSSimulator(compiler.operations)
+        mps.run()
+        if np.allclose(dense_state, mps.to_statevector()):
+            print(f"\033[92m[MPS] '{path}' matches the dense simulator.\033[0m")
+        else:
+            print(f"\033[91m[MPS] '{path}' does not match the dense simulator.\033[0m")
+            failed = True
+    sys.exit(1 if failed else 0)
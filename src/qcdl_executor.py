@@ -18,8 +18,8 @@ from src.qsimulator import Simulator
 
 class QCLDExecutor:
 
-    def run(filename: str):
-        """Run and execute the file"""
+    def run(filename: str, num_shots: int = None):
+        """Run and execute the file, optionally sampling the given number of measurement shots."""
         try:
             with open(filename.strip(), "r") as file:
                 content = file.read()
@@ -42,6 +42,11 @@ class QCLDExecutor:
         simulator.print_final_state()
         simulator.print_result()
 
+        # Optionally sample measurement shots from the final distribution.
+        if num_shots is not None:
+            counts = simulator.sample(num_shots)
+            simulator.print_counts(counts)
+
 if __name__ == "__main__":
     filename = input("Enter the QCDL file name: ").strip()
     try:
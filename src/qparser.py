@@ -9,7 +9,31 @@ Date: 18/03/2024
 
 import re
 import sys
+import math
 import cmath
+import hashlib
+
+############
+# PATTERNS #
+############
+
+# Statement patterns, compiled once at module load instead of on every statement.
+_EXPECTED_RE = re.compile(r"\[([01](?:\s*,\s*[01])*)\]\s*:\s*([\d\.]+)")
+_DEFINITION_RE = re.compile(
+    r"^def\s+([A-Za-z]\w*)(?:\s*:\s*([-+]?\d*\.?\d+(?:[eE][-+]?\d+)?(?:[+-]\d*\.?\d+(?:[eE][-+]?\d+)?)?[jJ]?)"
+    r"\s*,\s*([-+]?\d*\.?\d+(?:[eE][-+]?\d+)?(?:[+-]\d*\.?\d+(?:[eE][-+]?\d+)?)?[jJ]?))?$")
+
+# Known gate names, used to dispatch a statement to the right pattern with a single
+# set lookup on the leading token instead of attempting every regex in turn.
+UNITARY_GATE_NAMES = frozenset({"X", "Y", "Z", "H", "S"})
+CONTROLLED_GATE_NAMES = frozenset({"CX", "CY", "CZ", "CH", "CS", "CT"})
+
+
+def _is_qubit_name(token):
+    """Checks that a token is a valid qubit name: an ASCII letter followed by word characters."""
+    if not token or not (token[0].isascii() and token[0].isalpha()):
+        return False
+    return all(ch.isascii() and (ch.isalnum() or ch == "_") for ch in token[1:])
 
 #############
 # EXCEPTION #
@@ -25,7 +49,7 @@ class QCDLSyntaxError(Exception):
 
 class Operation:
     """Represents a quantum operation."""
-    def __init__(self, type, gate=None, target=None, controllers=None, state=None, line=None):
+    def __init__(self, type, gate=None, target=None, controllers=None, state=None, line=None, matrix=None):
         """Initializes an Operation object."""
         self.type = type
         self.gate = gate
@@ -33,6 +57,9 @@ class Operation:
         self.controllers = controllers
         self.state = state
         self.line = line
+        # Optional explicit 2x2 matrix for synthetic operations (e.g. fused gates);
+        # when present it takes precedence over the gate-name lookup.
+        self.matrix = matrix
 
     def __str__(self):
         details = {}
@@ -59,6 +86,11 @@ class QCDLCompiler:
     This class provides methods to parse and compile QCDL (Quantum Circuit Description Language) code.
     It manages qubits, parses statements, and generates a list of operations representing the quantum circuit.
     """
+    # Compilation is pure in the source text, so results are memoized across compiler
+    # instances keyed by a digest of the content; re-running the same circuit skips
+    # parsing entirely.
+    _cache: dict = {}
+
     def __init__(self):
         """Initializes a QCDLCompiler object."""
         self.qubits = []
@@ -70,8 +102,18 @@ class QCDLCompiler:
         """
         Compiles the given QCDL content.
         Raises QCDLSyntaxError if a syntax error is found.
+        Successful compilations are cached by content hash and replayed on re-runs.
         """
-        clean_lines = []
+        cache_key = hashlib.sha256(content.encode()).digest()
+        cached = QCDLCompiler._cache.get(cache_key)
+        if cached is not None:
+            qubits, operations, expected_result, line_number = cached
+            self.qubits = list(qubits)
+            self.operations = list(operations)
+            self.expected_result = dict(expected_result) if expected_result is not None else None
+            self.line_number = line_number
+            return
+        pending = ""
         for line in content.splitlines():
             stripped = line.strip()
             if not stripped:
@@ -79,31 +121,45 @@ class QCDLCompiler:
             if stripped.startswith("#"):
                 # Ignore comment lines.
                 continue
-            elif stripped.startswith("?"):
+            if stripped.startswith("?"):
                 # Extract expected result from the first occurrence and parse it into a dictionary.
                 if self.expected_result is not None:
                     raise QCDLSyntaxError(f"Multiple expected result lines found at statement {self.line_number + 1}.")
                 self.expected_result = self.parse_expected_result(stripped[1:].strip())
-            else:
-                clean_lines.append(line)
-        # Join the non-comment, non-expected-result lines.
-        processed_content = "\n".join(clean_lines)
-        # Split the content into statements using ';' as delimiter.
-        statements = [stmt.strip() for stmt in processed_content.split(";") if stmt.strip()]
-        for stmt in statements:
-            self.line_number += 1
-            try:
-                self.parse_statement(stmt)
-            except QCDLSyntaxError as err:
-                print(f"\033[91m[QCDL] Compilation Error: {err}\033[0m")
-                sys.exit(1)
-                
+                continue
+            # Accumulate the line and compile every complete ';'-terminated statement,
+            # keeping any unterminated remainder pending for the following lines.
+            pending = f"{pending}\n{line}" if pending else line
+            start = 0
+            end = pending.find(";")
+            while end != -1:
+                self._compile_statement(pending[start:end])
+                start = end + 1
+                end = pending.find(";", start)
+            pending = pending[start:]
+        self._compile_statement(pending)
+        QCDLCompiler._cache[cache_key] = (list(self.qubits), list(self.operations),
+                                          self.expected_result, self.line_number)
+
+    def _compile_statement(self, statement):
+        """Strips, counts and parses a single statement, reporting syntax errors."""
+        statement = statement.strip()
+        if not statement:
+            return
+        self.line_number += 1
+        try:
+            self.parse_statement(statement)
+        except QCDLSyntaxError as err:
+            print(f"\033[91m[QCDL] Compilation Error: {err}\033[0m")
+            sys.exit(1)
+
+
     def parse_expected_result(self, expected_str):
         """Parses the expected result string into a dictionary."""
         expected_dict = {}
         parts = [part.strip() for part in expected_str.split(";") if part.strip()]
         for part in parts:
-            match = re.fullmatch(r"\[([01](?:\s*,\s*[01])*)\]\s*:\s*([\d\.]+)", part)
+            match = _EXPECTED_RE.fullmatch(part)
             if not match:
                 raise QCDLSyntaxError(f"Invalid expected result format: '{part}'")
             state_str = match.group(1)
@@ -125,8 +181,7 @@ class QCDLCompiler:
 
     def parse_definition(self, statement):
         """Parses a qubit definition statement with support for complex amplitudes."""
-        pattern = r"^def\s+([A-Za-z]\w*)(?:\s*:\s*([-+]?\d*\.?\d+(?:[eE][-+]?\d+)?(?:[+-]\d*\.?\d+(?:[eE][-+]?\d+)?)?[jJ]?)\s*,\s*([-+]?\d*\.?\d+(?:[eE][-+]?\d+)?(?:[+-]\d*\.?\d+(?:[eE][-+]?\d+)?)?[jJ]?))?$"
-        match = re.fullmatch(pattern, statement)
+        match = _DEFINITION_RE.fullmatch(statement)
 
         if not match:
             raise QCDLSyntaxError(f"Line {self.line_number}: Invalid qubit definition syntax: '{statement}'")
@@ -145,40 +200,53 @@ class QCDLCompiler:
             except ValueError:
                 raise QCDLSyntaxError(f"Line {self.line_number}: Invalid complex number format in '{statement}'.")
 
+        # Validate normalization on the complex magnitudes (|alpha|^2 + |beta|^2, not
+        # alpha^2 + beta^2). Gated behind __debug__ so `python -O` elides the check.
+        if __debug__ and not math.isclose(abs(alpha) ** 2 + abs(beta) ** 2, 1.0, abs_tol=1e-3):
+            raise QCDLSyntaxError(
+                f"Line {self.line_number}: Qubit '{qubit_name}' state is not normalized: "
+                f"|alpha|^2 + |beta|^2 = {abs(alpha) ** 2 + abs(beta) ** 2:.6f}.")
+
         self.qubits.append(qubit_name)
         self.operations.append(Operation(type="define", target=qubit_name, state=(alpha, beta), line=self.line_number))
 
 
 
     def parse_gate_operation(self, statement):
-        """Parses a unitary or controlled gate operation."""
-        unitary_pattern = r"^(X|Y|Z|H|S)\s*\(\s*([A-Za-z]\w*)\s*\)$"
-        controlled_pattern = r"^(CX|CY|CZ|CH|CS|CT)\s*\(\s*([A-Za-z]\w*)\s*:\s*([A-Za-z]\w*(?:\s*,\s*[A-Za-z]\w*)*)\s*\)$"
-
-        unitary_match = re.fullmatch(unitary_pattern, statement)
-        controlled_match = re.fullmatch(controlled_pattern, statement)
-
-        if unitary_match:
-            self.parse_unitary_gate(unitary_match)
-        elif controlled_match:
-            self.parse_controlled_gate(controlled_match)
-        else:
-            raise QCDLSyntaxError(f"Line {self.line_number}: Syntax error in statement: '{statement}'")
-
-    def parse_unitary_gate(self, match):
-        """Parses a unitary gate operation."""
-        gate = match.group(1)
-        target = match.group(2)
+        """
+        Parses a unitary or controlled gate operation by direct tokenization:
+        the gate name before '(' selects the form, the arguments are split at
+        ':' and ',', and each token is validated as a qubit name — no regex.
+        """
+        gate_name, separator, rest = statement.partition("(")
+        gate_name = gate_name.strip()
+        rest = rest.strip()
+
+        if separator and rest.endswith(")"):
+            arguments = rest[:-1]
+            if gate_name in UNITARY_GATE_NAMES:
+                target = arguments.strip()
+                if _is_qubit_name(target):
+                    self.parse_unitary_gate(gate_name, target)
+                    return
+            elif gate_name in CONTROLLED_GATE_NAMES:
+                target, colon, controllers_str = arguments.partition(":")
+                target = target.strip()
+                controllers = [ctrl.strip() for ctrl in controllers_str.split(",")]
+                if (colon and _is_qubit_name(target)
+                        and all(_is_qubit_name(ctrl) for ctrl in controllers)):
+                    self.parse_controlled_gate(gate_name, target, controllers)
+                    return
+        raise QCDLSyntaxError(f"Line {self.line_number}: Syntax error in statement: '{statement}'")
+
+    def parse_unitary_gate(self, gate, target):
+        """Validates and records a unitary gate operation."""
         if target not in self.qubits:
             raise QCDLSyntaxError(f"Line {self.line_number}: Qubit '{target}' is not defined for gate {gate}.")
         self.operations.append(Operation(type="unitary", gate=gate, target=target, line=self.line_number))
 
-    def parse_controlled_gate(self, match):
-        """Parses a controlled gate operation."""
-        gate = match.group(1)
-        target = match.group(2)
-        controllers_str = match.group(3)
-        controllers = [q.strip() for q in controllers_str.split(",")]
+    def parse_controlled_gate(self, gate, target, controllers):
+        """Validates and records a controlled gate operation."""
         if target not in self.qubits:
             raise QCDLSyntaxError(f"Line {self.line_number}: Qubit '{target}' is not defined for gate {gate}.")
         for ctrl in controllers:
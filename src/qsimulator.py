@@ -8,9 +8,41 @@ Date: 18/03/2024
 """
 
 import math
+import functools
 import numpy as np
 from src.qparser import Operation
 
+# Numba is optional: when available the JIT-compiled kernels from src._kernels are
+# used, otherwise the vectorized NumPy implementations below are the fallback.
+from src._kernels import NUMBA_AVAILABLE, unitary_kernel, controlled_kernel
+
+# opt_einsum is optional: when available, multi-qubit gate contractions run through
+# precompiled contraction expressions with cached paths instead of plain np.einsum.
+try:
+    import opt_einsum
+    OPT_EINSUM_AVAILABLE = True
+except ImportError:
+    OPT_EINSUM_AVAILABLE = False
+
+# CuPy is optional as well: when available the state vector can live on the GPU,
+# where the amplitude updates are embarrassingly parallel and bandwidth-limited.
+try:
+    import cupy
+    CUPY_AVAILABLE = True
+except ImportError:
+    CUPY_AVAILABLE = False
+
+# Minimum number of qubits before the GPU pays for its kernel-launch overhead;
+# below this the state vector is too small to amortize transfers and launches.
+GPU_QUBIT_THRESHOLD = 18
+
+
+def _array_module(state):
+    """Returns the array module (numpy or cupy) that owns the given state vector."""
+    if CUPY_AVAILABLE:
+        return cupy.get_array_module(state)
+    return np
+
 #################
 # QUANTUM GATES #
 #################
@@ -29,12 +61,14 @@ UNITARY_MAP: Mapping from unitary gate names to their matrices.
 CONTROLLED_MAP: Mapping from controlled gate names to their matrices.
 """
     
+_INV_SQRT2: float = 1.0 / math.sqrt(2.0)
+
 I_GATE: np.ndarray = np.array([[1, 0], [0, 1]], dtype=complex)
 X_GATE: np.ndarray = np.array([[0, 1], [1, 0]], dtype=complex)
 Y_GATE: np.ndarray = np.array([[0, -1j], [1j, 0]], dtype=complex)
 Z_GATE: np.ndarray = np.array([[1, 0], [0, -1]], dtype=complex)
-H_GATE: np.ndarray = np.array([[1 / math.sqrt(2), 1 / math.sqrt(2)],
-                                [1 / math.sqrt(2), -1 / math.sqrt(2)]], dtype=complex)
+H_GATE: np.ndarray = np.array([[_INV_SQRT2, _INV_SQRT2],
+                                [_INV_SQRT2, -_INV_SQRT2]], dtype=complex)
 S_GATE: np.ndarray = np.array([[1, 0], [0, 1j]], dtype=complex)
 T_GATE: np.ndarray = np.array([[1, 0], [0, np.exp(1j * math.pi / 4)]], dtype=complex)
 
@@ -57,45 +91,363 @@ CONTROLLED_MAP: dict = {
     "CT": T_GATE,
 }
 
+# The module-level gate matrices are shared by every simulator instance and by the
+# dtype-cast cache below; freeze them so a stray in-place edit cannot corrupt
+# later simulations that reuse the cached objects.
+for _gate in (I_GATE, X_GATE, Y_GATE, Z_GATE, H_GATE, S_GATE, T_GATE):
+    _gate.flags.writeable = False
+
+# Gate maps cast to a specific precision, built lazily and cached per dtype.
+_GATE_MAP_CACHE: dict = {}
+
+def gate_maps(dtype) -> tuple:
+    """
+    Returns the (unitary, controlled) gate maps with matrices cast to the given dtype.
+    The cast maps are memoized per dtype and their matrices are frozen read-only,
+    since the same objects are handed out to every simulator instance.
+    """
+    key = np.dtype(dtype)
+    maps = _GATE_MAP_CACHE.get(key)
+    if maps is None:
+        maps = ({name: matrix.astype(key) for name, matrix in UNITARY_MAP.items()},
+                {name: matrix.astype(key) for name, matrix in CONTROLLED_MAP.items()})
+        for gate_map in maps:
+            for matrix in gate_map.values():
+                matrix.flags.writeable = False
+        _GATE_MAP_CACHE[key] = maps
+    return maps
+
 
 ######################
 # QUANTUM OPERATIONS #
 ######################
 
-def apply_unitary_gate(state: np.ndarray, operator: np.ndarray, target_index: int, num_qubits: int) -> None:
-    """Applies a one-qubit unitary gate to the given state vector."""
-    total_states = 2 ** num_qubits
+def gate_scalars(operator: np.ndarray) -> tuple:
+    """
+    Flattens a 2x2 gate matrix into a (u00, u01, u10, u11) tuple of Python complex
+    scalars. NumPy broadcasts a Python scalar onto an array slightly faster than a
+    0-d ndarray, and the gate kernels can then skip four ndarray __getitem__ calls
+    per application; the Numba kernels want plain scalar arguments anyway.
+    """
+    return (complex(operator[0, 0]), complex(operator[0, 1]),
+            complex(operator[1, 0]), complex(operator[1, 1]))
+
+
+def apply_unitary_gate(state: np.ndarray, operator: tuple, target_index: int, num_qubits: int, scratch: tuple = None) -> None:
+    """
+    Applies a one-qubit unitary gate, given as a (u00, u01, u10, u11) scalar tuple,
+    to the given state vector in place.
+    The state vector is viewed as a (blocks, 2, stride) array so that the middle axis
+    selects the target qubit bit; amplitude pairs (i, i | target_mask) are then updated
+    with a single vectorized expression over contiguous memory, without building index arrays.
+    When a tuple of three preallocated half-size buffers is passed as scratch, every
+    intermediate lands in those buffers via out= and the update allocates nothing.
+    """
+    u00, u01, u10, u11 = operator
     target_mask = 1 << (num_qubits - 1 - target_index)
-    indices = np.arange(total_states)
-    mask = (indices & target_mask) == 0
-    indices_zero = indices[mask]
-    indices_one = indices_zero + target_mask
-
-    amplitude_zero = state[indices_zero].copy()
-    amplitude_one = state[indices_one].copy()
+    if NUMBA_AVAILABLE and _array_module(state) is np:
+        unitary_kernel(state, target_mask, u00, u01, u10, u11)
+        return
+    view = state.reshape(-1, 2, target_mask)
+
+    if scratch is not None:
+        half_shape = (view.shape[0], target_mask)
+        amplitude_zero = scratch[0].reshape(half_shape)
+        amplitude_one = scratch[1].reshape(half_shape)
+        product = scratch[2].reshape(half_shape)
+        np.copyto(amplitude_zero, view[:, 0, :])
+        np.copyto(amplitude_one, view[:, 1, :])
+        np.multiply(amplitude_zero, u00, out=view[:, 0, :])
+        np.multiply(amplitude_one, u01, out=product)
+        np.add(view[:, 0, :], product, out=view[:, 0, :])
+        np.multiply(amplitude_zero, u10, out=view[:, 1, :])
+        np.multiply(amplitude_one, u11, out=product)
+        np.add(view[:, 1, :], product, out=view[:, 1, :])
+        return
+
+    amplitude_zero = view[:, 0, :].copy()
+    amplitude_one = view[:, 1, :].copy()
+
+    view[:, 0, :] = u00 * amplitude_zero + u01 * amplitude_one
+    view[:, 1, :] = u10 * amplitude_zero + u11 * amplitude_one
+
+@functools.lru_cache(maxsize=None)
+def _kqubit_expression(target_axes: tuple, num_qubits: int):
+    """
+    Builds the precompiled opt_einsum contraction expression for a k-qubit gate on
+    the given target axes, so path finding and subscript parsing happen once per
+    (axes, n) combination rather than on every application. Only called when
+    opt_einsum is installed.
+    """
+    k = len(target_axes)
+    state_labels = [opt_einsum.get_symbol(i) for i in range(num_qubits)]
+    out_labels = [opt_einsum.get_symbol(num_qubits + i) for i in range(k)]
+    output_labels = list(state_labels)
+    for label, axis in zip(out_labels, target_axes):
+        output_labels[axis] = label
+    subscripts = (f"{''.join(out_labels)}{''.join(state_labels[axis] for axis in target_axes)},"
+                  f"{''.join(state_labels)}->{''.join(output_labels)}")
+    return opt_einsum.contract_expression(subscripts, (2,) * (2 * k), (2,) * num_qubits)
+
+
+def apply_kqubit_gate(state: np.ndarray, gate: np.ndarray, target_axes: tuple, num_qubits: int) -> None:
+    """
+    Applies a dense k-qubit gate to the given state vector in place via one einsum
+    contraction, as the generic fallback for gates the specialized one-qubit and
+    controlled paths do not cover. The state is viewed as a (2,)*n tensor and the
+    (2^k, 2^k) gate as a rank-2k tensor whose input axes are contracted against the
+    target axes, costing O(2^N) per gate instead of materializing the full 2^N x 2^N
+    operator through Kronecker products. With opt_einsum installed, the contraction
+    runs through a cached precompiled expression; the fallback uses einsum's
+    integer-label interface so any number of qubits is supported either way.
+    """
+    k = len(target_axes)
+    tensor = state.reshape((2,) * num_qubits)
+    gate_tensor = np.asarray(gate).reshape((2,) * (2 * k))
+    if OPT_EINSUM_AVAILABLE:
+        result = _kqubit_expression(tuple(target_axes), num_qubits)(gate_tensor, tensor)
+        state[:] = result.reshape(-1)
+        return
+    state_labels = list(range(num_qubits))
+    out_axis_labels = list(range(num_qubits, num_qubits + k))
+    gate_labels = out_axis_labels + [state_labels[axis] for axis in target_axes]
+    output_labels = list(state_labels)
+    for new_label, axis in zip(out_axis_labels, target_axes):
+        output_labels[axis] = new_label
+    result = np.einsum(gate_tensor, gate_labels, tensor, state_labels, output_labels)
+    state[:] = result.reshape(-1)
+
+
+@functools.lru_cache(maxsize=None)
+def _unfold_permutations(qubits: tuple, num_qubits: int) -> tuple:
+    """
+    Returns the (forward, inverse) axis permutations that move the given qubit axes
+    to the front of the (2,)*n state tensor and back. Circuits reapply gates to the
+    same qubit combinations, so the permutations are memoized.
+    """
+    forward = tuple(qubits) + tuple(q for q in range(num_qubits) if q not in qubits)
+    inverse = tuple(int(axis) for axis in np.argsort(forward))
+    return forward, inverse
+
+
+def apply_gate_unfold(state: np.ndarray, matrix: np.ndarray, qubits: tuple, num_qubits: int) -> None:
+    """
+    Applies a dense k-qubit gate by unfolding the state tensor: the target axes are
+    transposed to the front, the tensor is reshaped to a (2^k, 2^(n-k)) matrix, and
+    the gate is applied as a single matrix product before folding back. The one
+    matmul runs through BLAS's tuned zgemm, avoiding einsum's per-call subscript
+    parsing and path planning, which makes this the preferred generic path over
+    apply_kqubit_gate for larger states.
+    """
+    forward, inverse = _unfold_permutations(tuple(qubits), num_qubits)
+    unfolded = state.reshape((2,) * num_qubits).transpose(forward).reshape(2 ** len(qubits), -1)
+    unfolded = np.asarray(matrix) @ unfolded
+    state[:] = unfolded.reshape((2,) * num_qubits).transpose(inverse).reshape(-1)
+
+
+def _apply_x(state: np.ndarray, target_mask: int) -> None:
+    """Applies a Pauli-X gate as a pure swap of the target-bit slices; no arithmetic."""
+    view = state.reshape(-1, 2, target_mask)
+    swapped = view[:, 0, :].copy()
+    view[:, 0, :] = view[:, 1, :]
+    view[:, 1, :] = swapped
+
+def _apply_z(state: np.ndarray, target_mask: int) -> None:
+    """Applies a Pauli-Z gate as a sign flip on the |1> half; no complex multiplies."""
+    view = state.reshape(-1, 2, target_mask)
+    np.negative(view[:, 1, :], out=view[:, 1, :])
+
+def _apply_h(state: np.ndarray, target_mask: int) -> None:
+    """Applies a Hadamard gate as scaled sum/difference of the two slices."""
+    view = state.reshape(-1, 2, target_mask)
+    amplitude_zero = view[:, 0, :].copy()
+    amplitude_one = view[:, 1, :]
+    view[:, 0, :] = (amplitude_zero + amplitude_one) * _INV_SQRT2
+    view[:, 1, :] = (amplitude_zero - amplitude_one) * _INV_SQRT2
+
+def _apply_phase(state: np.ndarray, target_mask: int, phase: complex) -> None:
+    """Applies a diagonal phase gate by multiplying the |1> half in place; one complex multiply per amplitude."""
+    view = state.reshape(-1, 2, target_mask)
+    view[:, 1, :] *= phase
+
+def _apply_s(state: np.ndarray, target_mask: int) -> None:
+    """Applies an S gate as a phase of i on the |1> half."""
+    _apply_phase(state, target_mask, 1j)
+
+def _apply_t(state: np.ndarray, target_mask: int) -> None:
+    """Applies a T gate as a phase of exp(i*pi/4) on the |1> half."""
+    _apply_phase(state, target_mask, T_GATE[1, 1])
+
+# Gates with a cheaper direct implementation than the general 2x2 update.
+SPECIALIZED_UNITARY: dict = {
+    "X": _apply_x,
+    "Z": _apply_z,
+    "H": _apply_h,
+    "S": _apply_s,
+    "T": _apply_t,
+}
 
-    state[indices_zero] = operator[0, 0] * amplitude_zero + operator[0, 1] * amplitude_one
-    state[indices_one] = operator[1, 0] * amplitude_zero + operator[1, 1] * amplitude_one
+@functools.lru_cache(maxsize=None)
+def _control_selectors(total_states: int, control_mask: int, target_mask: int) -> tuple:
+    """
+    Builds the two basic-indexing selectors that view the amplitudes whose control
+    bits are all 1, with the target bit fixed to 0 and to 1 respectively. Indexing
+    the (2,)*n-reshaped state with them yields zero-copy sub-array views, so no
+    index arrays or boolean masks are ever materialized. Deep circuits repeat the
+    same (size, controls, target) combinations, so results are memoized.
+    """
+    num_qubits = total_states.bit_length() - 1
+    selector_zero = []
+    selector_one = []
+    for axis in range(num_qubits):
+        bit = 1 << (num_qubits - 1 - axis)
+        if bit == target_mask:
+            # Keep the target axis as a length-1 slice rather than an integer, so the
+            # result is always an ndarray view even when every other axis is fixed.
+            selector_zero.append(slice(0, 1))
+            selector_one.append(slice(1, 2))
+        elif bit & control_mask:
+            selector_zero.append(1)
+            selector_one.append(1)
+        else:
+            selector_zero.append(slice(None))
+            selector_one.append(slice(None))
+    return tuple(selector_zero), tuple(selector_one)
+
+def _apply_controlled_x(state: np.ndarray, control_mask: int, target_mask: int) -> None:
+    """Applies a controlled-X as a pure amplitude swap on the control-selected slices; no arithmetic."""
+    tensor = state.reshape((2,) * (state.shape[0].bit_length() - 1))
+    selector_zero, selector_one = _control_selectors(state.shape[0], control_mask, target_mask)
+    swapped = tensor[selector_zero].copy()
+    tensor[selector_zero] = tensor[selector_one]
+    tensor[selector_one] = swapped
+
+def _apply_controlled_phase(state: np.ndarray, control_mask: int, target_mask: int, phase: complex) -> None:
+    """Applies a controlled diagonal gate as one phase multiply on the control-selected |1> slice."""
+    tensor = state.reshape((2,) * (state.shape[0].bit_length() - 1))
+    _, selector_one = _control_selectors(state.shape[0], control_mask, target_mask)
+    tensor[selector_one] *= phase
+
+def _apply_controlled_z(state: np.ndarray, control_mask: int, target_mask: int) -> None:
+    """Applies a controlled-Z as a sign flip."""
+    _apply_controlled_phase(state, control_mask, target_mask, -1)
+
+def _apply_controlled_s(state: np.ndarray, control_mask: int, target_mask: int) -> None:
+    """Applies a controlled-S as a phase of i."""
+    _apply_controlled_phase(state, control_mask, target_mask, 1j)
+
+def _apply_controlled_t(state: np.ndarray, control_mask: int, target_mask: int) -> None:
+    """Applies a controlled-T as a phase of exp(i*pi/4)."""
+    _apply_controlled_phase(state, control_mask, target_mask, T_GATE[1, 1])
+
+# Controlled gates with a cheaper direct implementation than the general 2x2 update.
+SPECIALIZED_CONTROLLED: dict = {
+    "CX": _apply_controlled_x,
+    "CZ": _apply_controlled_z,
+    "CS": _apply_controlled_s,
+    "CT": _apply_controlled_t,
+}
 
-def apply_controlled_gate(state: np.ndarray, operator: np.ndarray, control_indices: list, target_index: int, num_qubits: int) -> None:
-    """Applies a controlled gate to the given state vector. The gate is applied only when all control qubits are in state |1> and the target qubit is in state |0>."""
+def apply_controlled_gate(state: np.ndarray, operator: tuple, control_mask: int, target_index: int, num_qubits: int, scratch: tuple = None) -> None:
+    """
+    Applies a controlled gate, given as a (u00, u01, u10, u11) scalar tuple, to the
+    given state vector. The gate is applied only when all control qubits — given as
+    a precomputed bitmask — are in state |1> and the target qubit is in state |0>.
+    The control-selected amplitudes are addressed as zero-copy slices of the
+    (2,)*n-reshaped state, so no index arrays are built.
+    """
+    u00, u01, u10, u11 = operator
     total_states = 2 ** num_qubits
     target_mask = 1 << (num_qubits - 1 - target_index)
-    control_mask = 0
-    for control_index in control_indices:
-        control_mask |= (1 << (num_qubits - 1 - control_index))
-    
-    indices = np.arange(total_states)
-    # Update amplitudes where the target is 0 and all control bits are 1.
-    valid_mask = ((indices & target_mask) == 0) & ((indices & control_mask) == control_mask)
-    indices_zero = indices[valid_mask]
-    indices_one = indices_zero + target_mask
 
-    amplitude_zero = state[indices_zero].copy()
-    amplitude_one = state[indices_one].copy()
+    if NUMBA_AVAILABLE and _array_module(state) is np:
+        controlled_kernel(state, control_mask, target_mask, u00, u01, u10, u11)
+        return
+
+    tensor = state.reshape((2,) * num_qubits)
+    selector_zero, selector_one = _control_selectors(total_states, control_mask, target_mask)
+    view_zero = tensor[selector_zero]
+    view_one = tensor[selector_one]
+
+    if scratch is not None:
+        count = view_zero.size
+        amplitude_zero = scratch[0][:count].reshape(view_zero.shape)
+        amplitude_one = scratch[1][:count].reshape(view_zero.shape)
+        product = scratch[2][:count].reshape(view_zero.shape)
+        np.copyto(amplitude_zero, view_zero)
+        np.copyto(amplitude_one, view_one)
+        np.multiply(amplitude_zero, u00, out=view_zero)
+        np.multiply(amplitude_one, u01, out=product)
+        np.add(view_zero, product, out=view_zero)
+        np.multiply(amplitude_zero, u10, out=view_one)
+        np.multiply(amplitude_one, u11, out=product)
+        np.add(view_one, product, out=view_one)
+        return
+
+    amplitude_zero = view_zero.copy()
+    amplitude_one = view_one.copy()
+
+    tensor[selector_zero] = u00 * amplitude_zero + u01 * amplitude_one
+    tensor[selector_one] = u10 * amplitude_zero + u11 * amplitude_one
+
+#############
+# FUSION #
+#############
 
-    state[indices_zero] = operator[0, 0] * amplitude_zero + operator[0, 1] * amplitude_one
-    state[indices_one] = operator[1, 0] * amplitude_zero + operator[1, 1] * amplitude_one
+def fuse_single_qubit_gates(operations: list[Operation]) -> list[Operation]:
+    """
+    Peephole pass that merges runs of unitary gates on the same qubit into a single
+    operation carrying the product of their 2x2 matrices. Gates separated only by
+    operations on disjoint qubits are still merged, since those commute with any
+    single-qubit unitary; a controlled gate or measurement touching the qubit ends
+    its run. Each merged gate saves a full pass over the 2^N state vector, which is
+    the dominant cost of memory-bound state-vector simulation.
+    """
+    fused = []
+    open_runs = {}  # target qubit -> index in `fused` of the operation to merge into
+    for op in operations:
+        if op.type == "unitary":
+            position = open_runs.get(op.target)
+            if position is not None:
+                previous = fused[position]
+                previous_matrix = previous.matrix if previous.matrix is not None else UNITARY_MAP[previous.gate]
+                fused[position] = Operation(type="unitary", gate=f"{op.gate}*{previous.gate}",
+                                            target=op.target, line=previous.line,
+                                            matrix=UNITARY_MAP[op.gate] @ previous_matrix)
+            else:
+                open_runs[op.target] = len(fused)
+                fused.append(op)
+        elif op.type == "controlled":
+            open_runs.pop(op.target, None)
+            for ctrl in op.controllers:
+                open_runs.pop(ctrl, None)
+            fused.append(op)
+        elif op.type == "measurement":
+            open_runs.clear()
+            fused.append(op)
+        else:
+            fused.append(op)
+    return fused
+
+# Gates that are diagonal in the computational basis; a run of them commutes
+# freely and collapses into a single elementwise phase multiply.
+DIAGONAL_GATES = frozenset({"I", "Z", "S", "T"})
+DIAGONAL_CONTROLLED = frozenset({"CZ", "CS", "CT"})
+
+
+def is_diagonal_operation(op: Operation) -> bool:
+    """Checks whether an operation is diagonal in the computational basis."""
+    if op.type == "unitary":
+        if op.matrix is not None:
+            return op.matrix[0, 1] == 0 and op.matrix[1, 0] == 0
+        return op.gate in DIAGONAL_GATES
+    return op.type == "controlled" and op.gate in DIAGONAL_CONTROLLED
+
+# Encoded operation kinds for the integer program representation.
+KIND_UNITARY = 0
+KIND_CONTROLLED = 1
+KIND_MEASUREMENT = 2
+KIND_DIAGONAL = 3
 
 #############
 # SIMULATOR #
@@ -104,72 +456,283 @@ def apply_controlled_gate(state: np.ndarray, operator: np.ndarray, control_indic
 class Simulator:
     """Simulator for computing the final state vector of a quantum circuit."""
     operations: list[Operation]
-    qubit_definitions: list[tuple]
+    qubit_names: list[str]
     num_qubits: int
     state: np.ndarray
 
-    def __init__(self, operations: list[Operation]):
-        """Initializes the Simulator with a list of operations."""
-        self.operations = operations
-        self.qubit_definitions = []
+    def __init__(self, operations: list[Operation], device: str = "auto", dtype=np.complex128):
+        """
+        Initializes the Simulator with a list of operations.
+        The device can be 'cpu', 'cuda', or 'auto'; 'auto' selects the GPU only when
+        CuPy is installed and the circuit is large enough to amortize launch overhead.
+        The dtype selects the simulation precision: np.complex64 halves the memory
+        bandwidth of the memory-bound state updates at the cost of precision.
+        """
+        self.dtype = np.dtype(dtype)
+        self._unitary_map, self._controlled_map = gate_maps(self.dtype)
+        self.operations = fuse_single_qubit_gates(operations)
+        # Structure-of-arrays layout: qubit names in one list, initial amplitudes in
+        # two flat complex arrays, instead of a list of (name, (alpha, beta)) tuples.
+        self.qubit_names = []
+        alphas = []
+        betas = []
         for op in operations:
             if op.type == "define":
-                self.qubit_definitions.append((op.target, op.state))
-        if not self.qubit_definitions:
+                self.qubit_names.append(op.target)
+                alphas.append(op.state[0])
+                betas.append(op.state[1])
+        if not self.qubit_names:
             raise ValueError("No qubits defined in the circuit.")
-        self.num_qubits = len(self.qubit_definitions)
+        self.initial_alphas = np.array(alphas, dtype=complex)
+        self.initial_betas = np.array(betas, dtype=complex)
+        self.num_qubits = len(self.qubit_names)
+        self._qubit_index = {name: index for index, name in enumerate(self.qubit_names)}
+        if device == "auto":
+            device = "cuda" if CUPY_AVAILABLE and self.num_qubits >= GPU_QUBIT_THRESHOLD else "cpu"
+        if device == "cuda" and not CUPY_AVAILABLE:
+            raise ValueError("Device 'cuda' requested but CuPy is not installed.")
+        self.device = device
         self.state = self.build_initial_state()
+        if self.device == "cuda":
+            self.state = cupy.asarray(self.state)
+        # Scratch buffers for the allocation-free CPU gate kernel.
+        if self.device == "cpu":
+            half = 1 << (self.num_qubits - 1)
+            self._scratch = tuple(np.empty(half, dtype=self.dtype) for _ in range(3))
+        else:
+            self._scratch = None
+        # PCG64-backed generator for shot sampling; created once per simulator.
+        self._rng = np.random.default_rng()
+        self._encode_program()
+
+    def _encode_program(self) -> None:
+        """
+        Encodes the operation list into a structure-of-arrays program: an int8 kind
+        array, an int32 target-index array and a uint64 control-mask array, plus a
+        parallel table of resolved operators (2x2 matrix or specialized kernel).
+        Simulator.run then dispatches on small integers instead of re-resolving
+        strings and qubit names on every operation.
+        """
+        kinds = []
+        targets = []
+        control_masks = []
+        self.program_operators = []
+
+        def emit(op):
+            if op.type == "measurement":
+                kinds.append(KIND_MEASUREMENT)
+                targets.append(0)
+                control_masks.append(0)
+                self.program_operators.append(None)
+            elif op.type == "unitary":
+                if op.matrix is not None:
+                    # Fused matrices are built in full precision; cast once here.
+                    operator = op.matrix.astype(self.dtype)
+                elif op.gate in SPECIALIZED_UNITARY:
+                    operator = SPECIALIZED_UNITARY[op.gate]
+                elif op.gate in self._unitary_map:
+                    operator = self._unitary_map[op.gate]
+                else:
+                    raise ValueError(f"Unknown unitary gate: {op.gate}")
+                kinds.append(KIND_UNITARY)
+                targets.append(self.get_qubit_index(op.target))
+                control_masks.append(0)
+                self.program_operators.append(operator)
+            elif op.type == "controlled":
+                if op.gate not in self._controlled_map:
+                    raise ValueError(f"Unknown controlled gate: {op.gate}")
+                mask = 0
+                for ctrl in op.controllers:
+                    mask |= 1 << (self.num_qubits - 1 - self.get_qubit_index(ctrl))
+                kinds.append(KIND_CONTROLLED)
+                targets.append(self.get_qubit_index(op.target))
+                control_masks.append(mask)
+                if op.gate in SPECIALIZED_CONTROLLED:
+                    self.program_operators.append(SPECIALIZED_CONTROLLED[op.gate])
+                else:
+                    self.program_operators.append(self._controlled_map[op.gate])
+            else:
+                raise ValueError(f"Unknown operation type: {op.type}")
 
-    def build_initial_state(self) -> np.ndarray:
-        """Constructs the initial global state vector as the tensor product of individual qubit states."""
-        state = np.array([1], dtype=complex)
-        for _, (alpha, beta) in self.qubit_definitions:
-            qubit_state = np.array([alpha, beta], dtype=complex)
-            state = np.kron(state, qubit_state)
-        return state
-
-    def get_qubit_index(self, qubit_name: str) -> int:
-        """Retrieves the index of a qubit by its name."""
-        for index, (name, _) in enumerate(self.qubit_definitions):
-            if name == qubit_name:
-                return index
-        raise ValueError(f"Qubit {qubit_name} not found.")
+        # Diagonal gates commute with each other regardless of target, so a run of
+        # two or more collapses into one precomputed phase vector — a single state
+        # pass instead of one per gate. Shorter runs go through the normal paths.
+        pending_diagonal = []
+
+        def flush_diagonal():
+            if len(pending_diagonal) >= 2:
+                kinds.append(KIND_DIAGONAL)
+                targets.append(0)
+                control_masks.append(0)
+                self.program_operators.append(self._diagonal_phases(pending_diagonal))
+            else:
+                for buffered in pending_diagonal:
+                    emit(buffered)
+            pending_diagonal.clear()
 
-    def run(self) -> np.ndarray:
-        """Evolves the state vector by sequentially applying all quantum operations."""
         for op in self.operations:
             if op.type == "define":
                 continue
-            elif op.type == "unitary":
-                if op.gate not in UNITARY_MAP:
-                    raise ValueError(f"Unknown unitary gate: {op.gate}")
-                operator = UNITARY_MAP[op.gate]
-                target_index = self.get_qubit_index(op.target)
-                apply_unitary_gate(self.state, operator, target_index, self.num_qubits)
-            elif op.type == "controlled":
-                if op.gate not in CONTROLLED_MAP:
-                    raise ValueError(f"Unknown controlled gate: {op.gate}")
-                operator = CONTROLLED_MAP[op.gate]
-                target_index = self.get_qubit_index(op.target)
-                control_indices = [self.get_qubit_index(ctrl) for ctrl in op.controllers]
-                apply_controlled_gate(self.state, operator, control_indices, target_index, self.num_qubits)
-            elif op.type == "measurement":
-                # Measurement halts further operations.
+            if is_diagonal_operation(op):
+                pending_diagonal.append(op)
+            else:
+                flush_diagonal()
+                emit(op)
+        flush_diagonal()
+        self.program_kinds = np.array(kinds, dtype=np.int8)
+        self.program_targets = np.array(targets, dtype=np.int32)
+        self.program_control_masks = np.array(control_masks, dtype=np.uint64)
+        self._specialize_program()
+
+    def _diagonal_phases(self, run: list[Operation]) -> np.ndarray:
+        """
+        Folds a run of diagonal operations into one per-basis-state phase vector.
+        Each plain diagonal gate contributes its diagonal entry selected by the
+        target bit; each controlled diagonal gate multiplies only the indices where
+        all its control bits and the target bit are set.
+        """
+        indices = np.arange(2 ** self.num_qubits)
+        phases = np.ones(2 ** self.num_qubits, dtype=self.dtype)
+        for op in run:
+            target_mask = 1 << (self.num_qubits - 1 - self.get_qubit_index(op.target))
+            if op.type == "unitary":
+                matrix = op.matrix if op.matrix is not None else UNITARY_MAP[op.gate]
+                phases *= np.where(indices & target_mask, matrix[1, 1], matrix[0, 0])
+            else:
+                mask = target_mask
+                for ctrl in op.controllers:
+                    mask |= 1 << (self.num_qubits - 1 - self.get_qubit_index(ctrl))
+                phases[(indices & mask) == mask] *= CONTROLLED_MAP[op.gate][1, 1]
+        return phases
+
+    def _specialize_program(self) -> None:
+        """
+        Partially evaluates the encoded program into a flat list of prebound closures,
+        one per operation, with the operator, target mask/index, control mask and
+        scratch buffers baked in as constants. Simulator.run then calls them in order,
+        with no per-gate dispatch or argument resolution left in the loop.
+        """
+        steps = []
+        num_qubits = self.num_qubits
+        for i in range(self.program_kinds.shape[0]):
+            kind = self.program_kinds[i]
+            if kind == KIND_MEASUREMENT:
+                # Measurement halts further operations; later ops are never compiled in.
                 break
+            operator = self.program_operators[i]
+            target_index = int(self.program_targets[i])
+            if kind == KIND_DIAGONAL:
+                # Fused diagonal run: one elementwise multiply by the phase vector.
+                phases = cupy.asarray(operator) if self.device == "cuda" else operator
+                steps.append(lambda state, ph=phases: np.multiply(state, ph, out=state))
+            elif kind == KIND_UNITARY:
+                if callable(operator):
+                    target_mask = 1 << (num_qubits - 1 - target_index)
+                    steps.append(lambda state, kernel=operator, mask=target_mask: kernel(state, mask))
+                else:
+                    # Flatten the matrix to Python scalars once, not on every application.
+                    steps.append(lambda state, op=gate_scalars(operator), t=target_index, s=self._scratch:
+                                 apply_unitary_gate(state, op, t, num_qubits, s))
             else:
-                raise ValueError(f"Unknown operation type: {op.type}")
+                control_mask = int(self.program_control_masks[i])
+                if callable(operator):
+                    target_mask = 1 << (num_qubits - 1 - target_index)
+                    steps.append(lambda state, kernel=operator, c=control_mask, m=target_mask:
+                                 kernel(state, c, m))
+                else:
+                    steps.append(lambda state, op=gate_scalars(operator), c=control_mask, t=target_index, s=self._scratch:
+                                 apply_controlled_gate(state, op, c, t, num_qubits, s))
+        self._compiled_steps = steps
+
+    def build_initial_state(self) -> np.ndarray:
+        """
+        Constructs the initial global state vector without a Kronecker chain: for a
+        product state, the amplitude at basis index i is the product over qubits of
+        alpha_k or beta_k depending on bit k of i, so the whole vector is computed
+        as one broadcast bit-extraction and a single product reduction, instead of
+        n kron calls with intermediate allocations of every power-of-two size.
+        """
+        if not np.any(self.initial_betas):
+            # Common all-|0> case: a single nonzero amplitude, no products needed.
+            state = np.zeros(2 ** self.num_qubits, dtype=self.dtype)
+            state[0] = self.initial_alphas.prod()
+            return state
+        shifts = np.arange(self.num_qubits - 1, -1, -1)
+        bits = (np.arange(2 ** self.num_qubits)[:, None] >> shifts) & 1
+        amplitudes = np.where(bits, self.initial_betas, self.initial_alphas)
+        return amplitudes.prod(axis=1).astype(self.dtype)
+
+    def get_qubit_index(self, qubit_name: str) -> int:
+        """Retrieves the index of a qubit by its name with an O(1) dict lookup."""
+        try:
+            return self._qubit_index[qubit_name]
+        except KeyError:
+            raise ValueError(f"Qubit {qubit_name} not found.")
+
+    def run(self) -> np.ndarray:
+        """Evolves the state vector by running the specialized per-circuit step list."""
+        for step in self._compiled_steps:
+            step(self.state)
+        if self.device == "cuda":
+            # Bring the evolved state back to the host for measurement and printing.
+            self.state = cupy.asnumpy(self.state)
         return self.state
 
+    def sample(self, num_shots: int) -> np.ndarray:
+        """
+        Draws measurement outcomes for the given number of shots and returns the
+        per-outcome counts. The unitary evolution is deterministic, so the circuit
+        state is evolved only once and the counts come from a single multinomial
+        draw over the final probability distribution — no per-shot outcome array
+        or bincount pass is ever built.
+        """
+        probabilities = np.abs(self.state) ** 2
+        # The evolution is unitary, so the probabilities already sum to 1 up to
+        # floating-point drift; renormalize only when the drift is measurable
+        # (the threshold stays below the RNG's own sum-to-1 tolerance).
+        total = probabilities.sum()
+        if abs(total - 1.0) > 1e-9:
+            probabilities /= total
+        return self._rng.multinomial(num_shots, probabilities)
+
+    def print_counts(self, counts: np.ndarray) -> None:
+        """Prints the sampled outcome counts in a formatted table, skipping outcomes never observed."""
+        num_shots = int(counts.sum())
+        print(f"\n\033[94mSampled Counts ({num_shots} shots):\033[0m")
+
+        observed = np.flatnonzero(counts)
+        max_outcome_len = self.num_qubits + 2
+        # One max reduction instead of a str() call per basis state.
+        max_count_len = len(str(int(counts.max()))) if observed.size else 1
+        total_width = max_outcome_len + max_count_len + 10
+
+        print("-" * total_width)
+        outcome_header = "\033[93mOutcome\033[0m"
+        count_header = "\033[93mCount\033[0m"
+        print(f"{outcome_header:<{max_outcome_len}} | {count_header:>{max_count_len}}")
+        print("-" * total_width)
+
+        for index in observed:
+            outcome = format(index, f'0{self.num_qubits}b')
+            print(f"|{outcome}>\t| {counts[index]:>{max_count_len}}")
+
+        print("-" * total_width)
+
     def print_result(self) -> None:
-        """Prints the outcome probabilities for each computational basis state in a formatted table, removing trailing zeros."""
+        """
+        Prints the outcome probabilities for the observable computational basis states
+        in a formatted table, removing trailing zeros. Probabilities are computed in
+        one vectorized pass and only the nonzero outcomes are formatted, so the Python
+        formatting work is proportional to the support of the state, not to 2^N.
+        """
         print("\n\033[94mOutcome Probabilities:\033[0m")
 
-        probabilities = np.abs(self.state) ** 2
-        total_states = 2 ** self.num_qubits
+        probabilities = np.abs(self.state) ** 2 * 100
+        observable = np.flatnonzero(probabilities > 1e-8)
 
         # Calculate maximum outcome string length and maximum probability string length.
         max_outcome_len = self.num_qubits + 2  # |001> -> length 5
-        max_prob_len = max(len(f"{p * 100:.3f}%") for p in probabilities)
+        max_prob_len = max(len(f"{probabilities[index]:.3f}%") for index in observable)
 
         # Calculate total table width.
         total_width = max_outcome_len + max_prob_len + 10
@@ -185,10 +748,9 @@ class Simulator:
         print("-" * total_width)
 
         # Print outcome probabilities.
-        for index in range(total_states):
+        for index in observable:
             outcome = format(index, f'0{self.num_qubits}b')
-            probability_percentage = probabilities[index] * 100
-            prob_str = f"{probability_percentage:.3f}".rstrip('0')
+            prob_str = f"{probabilities[index]:.3f}".rstrip('0')
             if prob_str.endswith('.'):
                 prob_str += '0'
             print(f"|{outcome}>\t| {prob_str:>{max_prob_len}}%")
@@ -9,20 +9,56 @@ Date: 18/03/2024
 """
 
 import os
+import pickle
+import hashlib
+import concurrent.futures
 import numpy as np
 from src.qsimulator import Simulator
 from src.qparser import QCDLCompiler
 
+# Salt for the on-disk compile cache digests; bump whenever the pickled compiler
+# layout changes (e.g. new Operation attributes) so stale entries miss instead of
+# unpickling into an outdated schema.
+_CACHE_FORMAT_VERSION = "1"
+
 ##########
 # TESTER #
 ##########
 
 class Tester:
-    def __init__(self, tests_directory="tests"):
+    def __init__(self, tests_directory="tests", cache_directory=".qcdl_cache"):
         """Initialize the tester."""
         self.tests_directory = tests_directory
+        self.cache_directory = cache_directory
         self.tolerance = 0.05
 
+    def _compile_cached(self, content):
+        """
+        Compiles QCDL content, memoizing the compiled result on disk keyed by a
+        blake2b digest of the source salted with the cache format version, so
+        entries written before a schema change simply miss. Re-running a test
+        whose file is unchanged loads the pickled compiler and skips parsing
+        entirely; any failure to load — missing, truncated or otherwise unusable
+        cache files — falls through to a normal compile.
+        """
+        digest = hashlib.blake2b(f"{_CACHE_FORMAT_VERSION}:{content}".encode()).hexdigest()
+        cache_path = os.path.join(self.cache_directory, f"{digest}.pkl")
+        try:
+            with open(cache_path, "rb") as cache_file:
+                return pickle.load(cache_file)
+        except Exception:
+            pass
+        compiler = QCDLCompiler()
+        compiler.compile(content)
+        try:
+            os.makedirs(self.cache_directory, exist_ok=True)
+            with open(cache_path, "wb") as cache_file:
+                pickle.dump(compiler, cache_file)
+        except OSError:
+            # The cache is best-effort; a read-only filesystem just means no reuse.
+            pass
+        return compiler
+
     def run_test(self, test_filename):
         """Run a single test."""
         test_path = os.path.join(self.tests_directory, test_filename)
@@ -33,10 +69,9 @@ class Tester:
             print(f"[TEST] Error reading test file '{test_filename}': {error}")
             return False
 
-        # Compile the QCDL content.
+        # Compile the QCDL content, reusing the on-disk cache when unchanged.
         try:
-            compiler = QCDLCompiler()
-            compiler.compile(content)
+            compiler = self._compile_cached(content)
         except Exception as error:
             print(f"[QCDL] Compilation error in '{test_filename}': {error}")
             return False
@@ -51,13 +86,13 @@ class Tester:
             simulator = Simulator(compiler.operations)
             final_state = simulator.run()
             probabilities = np.abs(final_state) ** 2 * 100
-            sim_percentages = {}
-            total_states = 2 ** simulator.num_qubits
-            for index in range(total_states):
-                outcome_tuple = tuple(int(bit) for bit in format(index, f'0{simulator.num_qubits}b'))
-                sim_percentages[outcome_tuple] = probabilities[index]
-            # Filter out outcomes with negligible (0.0) probability.
-            sim_percentages = {outcome: perc for outcome, perc in sim_percentages.items() if perc > 1e-6}
+            # Keep only outcomes with non-negligible probability, then extract their
+            # bit tuples with vectorized shifts instead of per-state string formatting.
+            observable = np.flatnonzero(probabilities > 1e-6)
+            shifts = np.arange(simulator.num_qubits - 1, -1, -1)
+            bits = (observable[:, None] >> shifts) & 1
+            sim_percentages = {tuple(row): probabilities[index]
+                               for row, index in zip(bits.tolist(), observable)}
         except Exception as error:
             print(f"[TEST] Simulation error in '{test_filename}': {error}")
             return False
@@ -88,28 +123,37 @@ class Tester:
 
         
     def compare_results(self, sim_percentages, expected_percentages):
-        """Compare simulation results with expected results within a specified tolerance."""
-        if set(sim_percentages.keys()) != set(expected_percentages.keys()):
+        """
+        Compare simulation results with expected results within a specified tolerance.
+        Both sides are gathered into aligned arrays and compared with one np.allclose
+        call instead of a ufunc dispatch per outcome.
+        """
+        if sim_percentages.keys() != expected_percentages.keys():
             return False
 
-        for outcome, expected_percentage in expected_percentages.items():
-            sim_percentage = sim_percentages[outcome]
-            if not np.isclose(sim_percentage, expected_percentage, rtol=self.tolerance):
-                return False
-        return True
+        outcomes = list(expected_percentages)
+        expected = np.fromiter((expected_percentages[outcome] for outcome in outcomes),
+                               dtype=float, count=len(outcomes))
+        actual = np.fromiter((sim_percentages[outcome] for outcome in outcomes),
+                             dtype=float, count=len(outcomes))
+        return np.allclose(actual, expected, rtol=self.tolerance)
 
     def run_all_tests(self):
         """
         Discover and run all .qcdl tests in the tests directory.
-        Prints a summary of passed and failed tests.
+        Tests are independent, so they are dispatched across a process pool when
+        there are enough of them to amortize worker startup; small suites run
+        serially. Prints a summary of passed and failed tests.
         """
         tests = [f for f in os.listdir(self.tests_directory) if f.endswith(".qcdl")]
         total_tests = len(tests)
-        passed_tests = 0
 
-        for test in tests:
-            if self.run_test(test):
-                passed_tests += 1
+        if total_tests < 4:
+            results = [self.run_test(test) for test in tests]
+        else:
+            with concurrent.futures.ProcessPoolExecutor() as executor:
+                results = list(executor.map(self.run_test, tests))
+        passed_tests = sum(results)
 
         print("\nTest Summary:")
         print("-" * 20)